@@ -1,6 +1,5 @@
 import streamlit as st
 import os
-import pickle
 import numpy as np
 from datetime import datetime
 from PIL import Image
@@ -9,9 +8,17 @@ import dlib
 import face_recognition
 import csv
 from scipy.spatial import distance as dist
+import sys
 import time
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from detectors import build_detector
+from frame_bus import SharedCapture
+from gallery import GalleryWriter, folder_fingerprint, iter_gallery
+from identity_votes import FaceTracker, IdentityVoter
+from preview import PreviewStream
+
 st.set_page_config(page_title="Virtual Police", layout="wide")
 st.markdown("""
 <style>
@@ -53,6 +60,18 @@ PREDICTOR_PATH = os.path.join(MODEL_DIR, "shape_predictor_68_face_landmarks.dat"
 ATT_DIR = os.path.join(BASE_DIR, "criminal_logs")
 os.makedirs(ATT_DIR, exist_ok=True)
 
+
+def session_is_watched():
+    # False once the browser tab for this script run has disconnected
+    try:
+        from streamlit.runtime import get_instance
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx is None or get_instance().is_active_session(ctx.session_id)
+    except Exception:
+        return True
+
+
 # Sidebar menu
 st.sidebar.title("📋 Virtual Police")
 st.sidebar.markdown("---")
@@ -101,32 +120,32 @@ elif st.session_state['action'] == "register":
 
 elif st.session_state['action'] == "train":
     st.subheader("⚡ Train Face Encodings")
+    resume = st.checkbox("Resume an interrupted training run", value=True,
+                         help="Untick to re-encode every criminal from scratch")
     if st.button("Train Now"):
         if not os.path.exists(DATA_DIR):
             st.error("No criminal images found!")
         else:
             os.makedirs(ENC_DIR, exist_ok=True)
-            data_enc = []
-            criminal_dirs = [os.path.join(DATA_DIR, d) for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
+            # Streamed to disk per criminal; an interrupted run resumes where it stopped
+            train_detector = build_detector("training")
+            criminal_dirs = sorted(os.path.join(DATA_DIR, d) for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d)))
+            current = {os.path.basename(d): folder_fingerprint(d) for d in criminal_dirs}
+            gallery = GalleryWriter(ENC_PATH, current, resume=resume)
             for cdir in criminal_dirs:
                 sid_name = os.path.basename(cdir)
+                if sid_name in gallery.done:
+                    continue
                 sid, name = sid_name.split("_",1)
-                encs = []
                 for img_file in os.listdir(cdir):
                     if img_file.endswith((".jpg",".png")):
                         path = os.path.join(cdir, img_file)
                         image = face_recognition.load_image_file(path)
-                        boxes = face_recognition.face_locations(image, model='hog')
+                        boxes = train_detector.locate(image)
                         enc_list = face_recognition.face_encodings(image, boxes)
-                        encs.extend(enc_list)
-                if encs:
-                    data_enc.append({
-                        "student_id": sid,
-                        "name": name,
-                        "encodings": [e.tolist() for e in encs]
-                    })
-            with open(ENC_PATH, "wb") as f:
-                pickle.dump(data_enc, f)
+                        gallery.add(sid, name, enc_list)
+                gallery.commit(sid_name, current[sid_name])
+            gallery.finish()
             st.success("✅ Face encodings trained successfully!")
 
 elif st.session_state['action'] == "attendance":
@@ -136,17 +155,14 @@ elif st.session_state['action'] == "attendance":
     if not os.path.exists(ENC_PATH):
         st.warning("⚠️ Train encodings first!")
     else:
-        with open(ENC_PATH, "rb") as f:
-            data = pickle.load(f)
-
         known_encodings = []
         known_names = []
-        for criminal in data:
+        for criminal in iter_gallery(ENC_PATH):
             for enc in criminal["encodings"]:
                 known_encodings.append(np.array(enc))
                 known_names.append(f"{criminal['student_id']} - {criminal['name']}")
 
-        detector = dlib.get_frontal_face_detector()
+        detector = build_detector("stream")  # detects on a half-size frame internally
         predictor = dlib.shape_predictor(PREDICTOR_PATH)
         (lStart, lEnd) = (42, 48)
         (rStart, rEnd) = (36, 42)
@@ -158,13 +174,16 @@ elif st.session_state['action'] == "attendance":
 
         stframe = st.empty()
         run = st.button("Start Detection")
+        preview = PreviewStream(max_fps=8, width=480, jpeg_quality=70, watching=session_is_watched)
 
         attendance_marked_faces = set()
 
         if run:
-            cap = cv2.VideoCapture(0)
+            cap = SharedCapture(0)
             blink_counters = {}
             blink_counts = {}
+            tracker = FaceTracker()
+            voter = IdentityVoter(known_encodings, known_names)
             start_time = None
             frame_count = 0
 
@@ -182,7 +201,8 @@ elif st.session_state['action'] == "attendance":
                 return (A + B) / (2.0 * C)
 
             while True:
-                ret, frame = cap.read()
+                # Private copy: detection, blinks and identity all run on one consistent frame
+                ret, frame = cap.read(copy=True)
                 if not ret:
                     st.error("Cannot access webcam!")
                     break
@@ -192,22 +212,24 @@ elif st.session_state['action'] == "attendance":
                 if frame_count % 3 != 0:
                     continue
 
-                small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)  # resize for faster processing
-                gray = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
-                rects = detector(gray, 0)
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                rects = detector(gray)
 
                 if start_time is None:
                     start_time = time.time()
 
-                for i, rect in enumerate(rects):
-                    # Scale face coords back to original frame size
-                    left = rect.left() * 2
-                    top = rect.top() * 2
-                    right_ = rect.right() * 2
-                    bottom = rect.bottom() * 2
-
-                    shape = predictor(cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY), rect)
-                    shape = [(shape.part(j).x * 2, shape.part(j).y * 2) for j in range(68)]
+                overlays = []
+                track_ids = tracker.update(rects)
+                voter.prune(tracker.tracks)
+                for i, rect in zip(track_ids, rects):
+                    # Detector already maps face coords back to original frame size
+                    left = rect.left()
+                    top = rect.top()
+                    right_ = rect.right()
+                    bottom = rect.bottom()
+
+                    shape = predictor(gray, rect)
+                    shape = [(shape.part(j).x, shape.part(j).y) for j in range(68)]
                     leftEye = shape[lStart:lEnd]
                     rightEye = shape[rStart:rEnd]
                     leftEAR = eye_aspect_ratio(leftEye)
@@ -225,31 +247,35 @@ elif st.session_state['action'] == "attendance":
                             blink_counts[i] += 1
                         blink_counters[i] = 0
 
-                    for (x, y) in leftEye + rightEye:
-                        cv2.circle(frame, (int(x), int(y)), 2, (0, 255, 0), -1)
-
-                    cv2.rectangle(frame, (left, top), (right_, bottom), (0, 255, 255), 2)
-                    cv2.putText(frame, "Detected Face", (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-
-                    if blink_counts[i] >= REQUIRED_BLINKS and i not in attendance_marked_faces:
-                        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        enc = face_recognition.face_encodings(rgb, [(top, right_, bottom, left)])
-                        if enc:
-                            distances = face_recognition.face_distance(known_encodings, enc[0])
-                            best_idx = np.argmin(distances)
-                            if distances[best_idx] < 0.5:
-                                name = known_names[best_idx]
-                                time_str = datetime.now().strftime("%H:%M:%S")
-                                with open(csv_path, "a", newline="") as f:
-                                    writer = csv.writer(f)
-                                    writer.writerow([name, date_str, time_str])
-                                st.success(f"✅ Detection marked for {name} at {time_str}")
-                                attendance_marked_faces.add(i)
+                    # Identity is voted over several sharp frames of the same track
+                    decision = voter.observe(i, frame, rect)
+
+                    overlays.append({
+                        "box": (left, top, right_, bottom),
+                        "label": decision['name'] if decision and decision['name'] else "Detected Face",
+                        "points": leftEye + rightEye,
+                    })
+
+                    if (decision and decision['name'] and blink_counts[i] >= REQUIRED_BLINKS
+                            and i not in attendance_marked_faces):
+                        name = decision['name']
+                        time_str = datetime.now().strftime("%H:%M:%S")
+                        with open(csv_path, "a", newline="") as f:
+                            writer = csv.writer(f)
+                            writer.writerow([name, date_str, time_str])
+                        st.success(f"✅ Detection marked for {name} at {time_str} "
+                                   f"(decided in {decision['latency']:.2f}s over {decision['samples']} frames)")
+                        attendance_marked_faces.add(i)
 
                 elapsed = time.time() - start_time
-                cv2.putText(frame, f"Blinks: {sum(blink_counts.values())}", (30, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                stframe.image(frame_rgb, channels="RGB")
+                if not cap.is_producer:
+                    # recognize.py owns the camera: show its published detections too
+                    for face in (cap.meta() or {}).get("faces", []):
+                        overlays.append({"box": face["box"], "label": face.get("label") or "recognizer",
+                                         "color": (255, 0, 255)})
+                jpeg = preview.publish(frame, overlays, text=f"Blinks: {sum(blink_counts.values())}")
+                if jpeg is not None:
+                    stframe.image(jpeg)
 
                 if elapsed > TIME_LIMIT and len(attendance_marked_faces) < len(rects):
                     st.warning("❌ Liveness check failed!")
@@ -0,0 +1,74 @@
+from pathlib import Path
+import sys
+import time
+import cv2
+from detectors import SOURCE_PROFILES, HogDetector, CascadeDetector, box_iou, build_detector
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+IMG_ROOT = BASE_DIR / 'data' / 'criminal_images'
+
+# Deployed per-source profiles first, so the report describes what the app runs
+CONFIGS = [(f"profile:{source}", lambda source=source: build_detector(source)) for source in SOURCE_PROFILES]
+
+# Extra variants, compared against the reference detector as well
+CONFIGS += [
+    ("hog up=0 scale=1.0", lambda: HogDetector(upsample=0, scale=1.0)),
+    ("hog up=0 scale=0.5", lambda: HogDetector(upsample=0, scale=0.5)),
+    ("cascade prop=0.25", lambda: CascadeDetector(upsample=0, proposal_scale=0.25)),
+    ("cascade prop=0.5", lambda: CascadeDetector(upsample=0, proposal_scale=0.5)),
+    ("cascade prop=0.5 scale=0.5", lambda: CascadeDetector(upsample=0, scale=0.5, proposal_scale=0.5)),
+]
+
+
+def _load_frames(root: Path):
+    paths = sorted(list(root.rglob("*.jpg")) + list(root.rglob("*.png")))
+    frames = []
+    for p in paths:
+        img = cv2.imread(str(p), cv2.IMREAD_GRAYSCALE)
+        if img is not None:
+            frames.append(img)
+    return frames
+
+
+def _matched(found, truth):
+    # Greedy IoU >= 0.5 matching of detections to reference faces
+    hits = 0
+    remaining = list(found)
+    for t in truth:
+        for f in remaining:
+            if box_iou(t, f) >= 0.5:
+                hits += 1
+                remaining.remove(f)
+                break
+    return hits
+
+
+def run_benchmark(root: Path = IMG_ROOT):
+    frames = _load_frames(root)
+    if not frames:
+        print(f"[WARN] No images found under {root}")
+        return
+
+    # Reference: full HOG with upsampling, as face_recognition.face_locations does
+    reference = HogDetector(upsample=1, scale=1.0)
+    truth = [reference.detect(f) for f in frames]
+    total_faces = sum(len(t) for t in truth)
+    print(f"[INFO] {len(frames)} images, {total_faces} reference faces")
+
+    print(f"{'config':<32}{'ms/frame':>10}{'recall':>9}{'extra':>7}")
+    for label, factory in CONFIGS:
+        detector = factory()
+        hits = extra = 0
+        start = time.perf_counter()
+        results = [detector.detect(f) for f in frames]
+        elapsed = time.perf_counter() - start
+        for found, t in zip(results, truth):
+            m = _matched(found, t)
+            hits += m
+            extra += len(found) - m
+        recall = hits / total_faces if total_faces else 0.0
+        print(f"{label:<32}{elapsed * 1000 / len(frames):>10.1f}{recall:>9.2f}{extra:>7}")
+
+
+if __name__ == "__main__":
+    run_benchmark(Path(sys.argv[1]) if len(sys.argv) > 1 else IMG_ROOT)
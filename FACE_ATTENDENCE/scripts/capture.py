@@ -0,0 +1,105 @@
+import struct
+import time
+import cv2
+import numpy as np
+from frame_bus import SharedCapture
+
+# ------------------ Session file format ------------------ #
+# MAGIC, then one record per frame: timestamp (s, float64), JPEG length (uint32), JPEG bytes
+MAGIC = b"VPREC1\n"
+RECORD = struct.Struct("<dI")
+
+
+class RecordingCapture:
+    """Wraps a live capture and appends every frame read to a session file."""
+
+    def __init__(self, cap, path, jpeg_quality=90):
+        self.cap = cap
+        self.path = str(path)
+        self.jpeg_quality = jpeg_quality
+        self._f = open(self.path, "wb")
+        self._f.write(MAGIC)
+        self._t0 = None
+        self.frames = 0
+
+    @property
+    def timestamp(self):
+        return getattr(self.cap, "timestamp", time.time())
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, copy=False):
+        ret, frame = self.cap.read(copy=copy) if isinstance(self.cap, SharedCapture) else self.cap.read()
+        if not ret:
+            return ret, frame
+        ts = self.timestamp
+        if self._t0 is None:
+            self._t0 = ts
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ok:
+            self._f.write(RECORD.pack(ts - self._t0, len(buf)))
+            self._f.write(buf.tobytes())
+            self.frames += 1
+        return ret, frame
+
+    def annotate(self, meta):
+        if hasattr(self.cap, "annotate"):
+            self.cap.annotate(meta)
+
+    def release(self):
+        self._f.close()
+        self.cap.release()
+        print(f"[INFO] Recorded {self.frames} frames to {self.path}")
+
+
+class ReplayCapture:
+    """Plays a recorded session back like a camera.
+
+    With ``realtime`` the original frame pacing is reproduced; otherwise frames
+    are returned as fast as the consumer reads them. Either way ``timestamp``
+    is the recorded time of the current frame, so time-based logic behaves
+    identically across runs.
+    """
+
+    def __init__(self, path, realtime=True):
+        self.path = str(path)
+        self.realtime = realtime
+        self._f = open(self.path, "rb")
+        if self._f.read(len(MAGIC)) != MAGIC:
+            self._f.close()
+            raise ValueError(f"{self.path} is not a recorded session")
+        self.timestamp = 0.0
+        self._wall_start = None
+
+    def isOpened(self):
+        return not self._f.closed
+
+    def read(self, copy=False):
+        # Decoded frames are always private, so ``copy`` needs no extra work
+        if self._f.closed:
+            return False, None
+        head = self._f.read(RECORD.size)
+        if len(head) < RECORD.size:
+            return False, None
+        ts, length = RECORD.unpack(head)
+        buf = self._f.read(length)
+        if len(buf) < length:
+            return False, None
+        frame = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+        if self.realtime:
+            now = time.monotonic()
+            if self._wall_start is None:
+                self._wall_start = now - ts
+            delay = self._wall_start + ts - now
+            if delay > 0:
+                time.sleep(delay)
+        self.timestamp = ts
+        return frame is not None, frame
+
+    def annotate(self, meta):
+        pass
+
+    def release(self):
+        self._f.close()
@@ -0,0 +1,126 @@
+import cv2
+import dlib
+import numpy as np
+
+# ------------------ Detector profiles per source ------------------ #
+# upsample: dlib HOG pyramid upsampling (0 = none, 1 = face_recognition default)
+# scale:    resize factor applied to the frame before detection
+# proposal_scale: downscale used by the Haar pre-filter of the cascade
+SOURCE_PROFILES = {
+    "webcam": {"kind": "cascade", "upsample": 0, "scale": 1.0, "proposal_scale": 0.25},
+    "stream": {"kind": "cascade", "upsample": 0, "scale": 0.5, "proposal_scale": 0.5},
+    "training": {"kind": "hog", "upsample": 1, "scale": 1.0},
+}
+
+HAAR_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+def rect_to_css(rect):
+    # dlib.rectangle -> (top, right, bottom, left) as used by face_recognition
+    return rect.top(), rect.right(), rect.bottom(), rect.left()
+
+
+def _to_gray(image):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return image
+
+
+def box_iou(a, b):
+    ix = max(0, min(a.right(), b.right()) - max(a.left(), b.left()))
+    iy = max(0, min(a.bottom(), b.bottom()) - max(a.top(), b.top()))
+    inter = ix * iy
+    union = a.area() + b.area() - inter
+    return inter / union if union else 0.0
+
+
+class HogDetector:
+    """Plain dlib HOG detector, optionally run on a resized frame."""
+
+    def __init__(self, upsample=0, scale=1.0):
+        self.upsample = upsample
+        self.scale = scale
+        self._hog = dlib.get_frontal_face_detector()
+
+    def __call__(self, image):
+        return self.detect(image)
+
+    def detect(self, image):
+        """Return dlib rectangles in the coordinates of ``image``."""
+        if self.scale == 1.0:
+            return list(self._hog(image, self.upsample))
+        small = cv2.resize(image, (0, 0), fx=self.scale, fy=self.scale)
+        return [self._rescale(r, 1.0 / self.scale) for r in self._hog(small, self.upsample)]
+
+    def locate(self, image):
+        """Same as ``detect`` but returns face_recognition style boxes.
+
+        Boxes are clipped to the image like ``face_recognition.face_locations``.
+        """
+        h, w = image.shape[:2]
+        return [(max(top, 0), min(right, w), min(bottom, h), max(left, 0))
+                for top, right, bottom, left in map(rect_to_css, self.detect(image))]
+
+    @staticmethod
+    def _rescale(rect, factor, dx=0, dy=0):
+        return dlib.rectangle(int(rect.left() * factor) + dx, int(rect.top() * factor) + dy,
+                              int(rect.right() * factor) + dx, int(rect.bottom() * factor) + dy)
+
+
+class CascadeDetector(HogDetector):
+    """Haar pre-filter on a heavily downscaled frame, HOG confirmation on the crops.
+
+    HOG only runs on padded regions around Haar candidates, so frames without
+    a face cost a single cheap Haar pass.
+    """
+
+    def __init__(self, upsample=0, scale=1.0, proposal_scale=0.25, pad=0.4,
+                 min_neighbors=3, haar_path=HAAR_PATH):
+        super().__init__(upsample=upsample, scale=scale)
+        self.proposal_scale = proposal_scale
+        self.pad = pad
+        self.min_neighbors = min_neighbors
+        self._haar = cv2.CascadeClassifier(haar_path)
+        if self._haar.empty():
+            raise RuntimeError(f"Could not load Haar cascade from {haar_path}")
+
+    def detect(self, image):
+        if self.scale != 1.0:
+            image = cv2.resize(image, (0, 0), fx=self.scale, fy=self.scale)
+        h, w = image.shape[:2]
+
+        tiny = cv2.resize(_to_gray(image), (0, 0), fx=self.proposal_scale, fy=self.proposal_scale)
+        proposals = self._haar.detectMultiScale(tiny, scaleFactor=1.2, minNeighbors=self.min_neighbors,
+                                                minSize=(20, 20))
+
+        found = []
+        for (x, y, pw, ph) in proposals:
+            # Map back to full resolution and pad so HOG sees the whole face
+            x, y = x / self.proposal_scale, y / self.proposal_scale
+            pw, ph = pw / self.proposal_scale, ph / self.proposal_scale
+            x0 = max(0, int(x - pw * self.pad))
+            y0 = max(0, int(y - ph * self.pad))
+            x1 = min(w, int(x + pw * (1 + self.pad)))
+            y1 = min(h, int(y + ph * (1 + self.pad)))
+            crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+            for r in self._hog(crop, self.upsample):
+                rect = self._rescale(r, 1.0, x0, y0)
+                if all(box_iou(rect, f) < 0.5 for f in found):
+                    found.append(rect)
+
+        if self.scale != 1.0:
+            found = [self._rescale(r, 1.0 / self.scale) for r in found]
+        return found
+
+
+def build_detector(source="webcam", **overrides):
+    """Create the detector configured for ``source`` (see SOURCE_PROFILES)."""
+    cfg = dict(SOURCE_PROFILES[source])
+    cfg.update(overrides)
+    kind = cfg.pop("kind")
+    if kind == "hog":
+        cfg.pop("proposal_scale", None)
+        return HogDetector(**cfg)
+    if kind == "cascade":
+        return CascadeDetector(**cfg)
+    raise ValueError(f"Unknown detector kind: {kind}")
@@ -0,0 +1,425 @@
+import json
+import os
+import struct
+import time
+from multiprocessing import shared_memory, resource_tracker
+import cv2
+import numpy as np
+
+# ------------------ Shared memory layout ------------------ #
+# [header][slot 0][slot 1]...[slot N-1]
+# header: magic, latest seq, heartbeat, height, width, channels, slots, meta_size, producer pid
+# slot:   seq (-1 while being written), timestamp, meta length, meta (JSON), frame
+MAGIC = b"VPBUS2\0\0"
+HEADER = struct.Struct("<8sqdiiiiiq")
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<qdi")
+SLOT_HEADER_SIZE = 32
+WRITING = -1
+
+DEFAULT_SLOTS = 8
+DEFAULT_META_SIZE = 4096
+
+
+def bus_name(camera_index=0):
+    return f"vp_cam{camera_index}"
+
+
+def _slot_stride(frame_bytes, meta_size):
+    size = SLOT_HEADER_SIZE + meta_size + frame_bytes
+    return (size + 63) // 64 * 64
+
+
+# Buses written by this process; their resource tracker entry belongs to the writer
+_OWNED = set()
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Consumers must not unlink the segment when they exit (Python < 3.13
+    # registers every attached segment with the resource tracker). Leave the
+    # entry alone when the producer lives in this process.
+    if name not in _OWNED:
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # Frame views are still referenced; the mapping goes away with them
+        pass
+
+
+class _FrameBus:
+    def _init_layout(self, height, width, channels, slots, meta_size):
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.slots = slots
+        self.meta_size = meta_size
+        self.frame_bytes = height * width * channels
+        self.stride = _slot_stride(self.frame_bytes, meta_size)
+
+    def _slot_offset(self, seq):
+        return HEADER_SIZE + (seq % self.slots) * self.stride
+
+    def _frame_view(self, seq):
+        offset = self._slot_offset(seq) + SLOT_HEADER_SIZE + self.meta_size
+        return np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def frame(self, seq):
+        """Read-only zero-copy view of the slot holding frame ``seq``."""
+        view = self._frame_view(seq)
+        view.flags.writeable = False
+        return view
+
+    def _read_header(self):
+        return HEADER.unpack_from(self.shm.buf, 0)
+
+    def _slot_seq(self, seq):
+        return SLOT_HEADER.unpack_from(self.shm.buf, self._slot_offset(seq))[0]
+
+    @property
+    def latest_seq(self):
+        return self._read_header()[1]
+
+    @property
+    def heartbeat(self):
+        return self._read_header()[2]
+
+    def producer_alive(self):
+        """False once the producer closed the bus or its process has exited.
+
+        A slow producer is not dead: only the owner's exit frees the bus.
+        """
+        header = self._read_header()
+        if header[2] == 0.0:
+            return False  # closed cleanly
+        pid = header[8]
+        if pid == os.getpid():
+            return self.name in _OWNED
+        return _pid_alive(pid)
+
+    def valid(self, seq):
+        """True while the slot still holds frame ``seq`` (not yet overwritten)."""
+        return seq >= 0 and self._slot_seq(seq) == seq
+
+    def meta(self, seq):
+        """Detection metadata attached to frame ``seq``, or None."""
+        offset = self._slot_offset(seq)
+        slot_seq, _, meta_len = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        if slot_seq != seq or meta_len <= 0:
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        raw = bytes(self.shm.buf[start:start + meta_len])
+        if not self.valid(seq):
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+
+class FrameBusWriter(_FrameBus):
+    """Single producer side of a shared-memory frame ring buffer (uint8 frames)."""
+
+    def __init__(self, name, shape, slots=DEFAULT_SLOTS, meta_size=DEFAULT_META_SIZE):
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        self._init_layout(height, width, channels, slots, meta_size)
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=HEADER_SIZE + slots * self.stride)
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, -1, time.time(), height, width, channels, slots, meta_size,
+                         os.getpid())
+        for i in range(slots):
+            SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(i), WRITING, 0.0, 0)
+        self._pending = None
+        _OWNED.add(name)
+
+    def begin(self):
+        """Reserve the next slot and return a writable view to fill in place."""
+        seq = self.latest_seq + 1
+        SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(seq), WRITING, 0.0, 0)
+        self._pending = seq
+        return self._frame_view(seq)
+
+    def commit(self, meta=None, ts=None):
+        """Publish the slot reserved by ``begin`` and return its sequence number."""
+        seq, self._pending = self._pending, None
+        ts = time.time() if ts is None else ts
+        meta_len = self._write_meta(seq, meta)
+        SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(seq), seq, ts, meta_len)
+        self._write_latest(seq, ts)
+        return seq
+
+    def abort(self):
+        # The reserved slot stays marked as being written; readers skip it
+        self._pending = None
+
+    def publish(self, frame, meta=None, ts=None):
+        """Copy ``frame`` into the ring and publish it."""
+        view = self.begin()
+        view[...] = frame
+        return self.commit(meta, ts)
+
+    def annotate(self, seq, meta):
+        """Attach detection metadata to an already published frame."""
+        if not self.valid(seq):
+            return False
+        offset = self._slot_offset(seq)
+        _, ts, _ = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        # Mark the slot as being written so readers never see half-rewritten JSON
+        SLOT_HEADER.pack_into(self.shm.buf, offset, WRITING, ts, 0)
+        meta_len = self._write_meta(seq, meta)
+        SLOT_HEADER.pack_into(self.shm.buf, offset, seq, ts, meta_len)
+        return True
+
+    def _write_meta(self, seq, meta):
+        if meta is None:
+            return 0
+        raw = json.dumps(meta).encode("utf-8")
+        if len(raw) > self.meta_size:
+            raise ValueError(f"Metadata is {len(raw)} bytes, bus allows {self.meta_size}")
+        start = self._slot_offset(seq) + SLOT_HEADER_SIZE
+        self.shm.buf[start:start + len(raw)] = raw
+        return len(raw)
+
+    def _write_latest(self, seq, ts):
+        header = list(self._read_header())
+        header[1:3] = [seq, ts]
+        HEADER.pack_into(self.shm.buf, 0, *header)
+
+    def close(self):
+        # Zero heartbeat: attached consumers see the bus as dead right away
+        self._write_latest(self.latest_seq, 0.0)
+        _close(self.shm)
+        _OWNED.discard(self.name)
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameBusReader(_FrameBus):
+    """Consumer side; frames are returned as read-only zero-copy views.
+
+    A view stays valid until the producer wraps around the ring; use
+    ``valid(seq)`` after long processing, or copy the frame if it must be kept.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.shm = _attach(name)
+        magic, _, _, h, w, c, slots, meta_size, _ = self._read_header()
+        if magic != MAGIC:
+            self.shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a frame bus")
+        self._init_layout(h, w, c, slots, meta_size)
+
+    def read(self, after=-1, timeout=1.0):
+        """Wait for a frame newer than ``after``; return (seq, ts, frame) or None."""
+        deadline = time.monotonic() + timeout
+        while True:
+            seq = self.latest_seq
+            if seq > after and self.valid(seq):
+                ts = SLOT_HEADER.unpack_from(self.shm.buf, self._slot_offset(seq))[1]
+                return seq, ts, self.frame(seq)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.002)
+
+    def close(self):
+        _close(self.shm)
+
+
+class SharedCapture:
+    """Drop-in for ``cv2.VideoCapture(index)`` that shares one camera between processes.
+
+    The first process to open a camera owns the device and publishes every
+    frame (plus optional detection metadata via ``annotate``) on the bus; any
+    later process reads from the bus instead of re-opening the device. When the
+    owner releases the camera or its process exits, a consumer takes the
+    device over. Frames returned by ``read`` are read-only views into shared
+    memory. The producer's own slots are only reused by its later reads, but a
+    consumer's can be overwritten at any time: ``copy=True`` gives consumers a
+    consistent private copy (the owner keeps reading zero-copy).
+
+    With ``block`` (the default) a consumer waits as long as the producer is
+    alive, like a camera would; ``block=False`` returns ``(False, None)`` after
+    ``timeout`` so UI loops stay responsive.
+    """
+
+    def __init__(self, index=0, slots=DEFAULT_SLOTS, timeout=1.0, block=True):
+        self.index = index
+        self.name = bus_name(index)
+        self.slots = slots
+        self.timeout = timeout
+        self.block = block
+        self.cap = None
+        self.writer = None
+        self.reader = None
+        self.last_seq = -1
+        self.timestamp = time.time()  # capture time of the last frame read
+        self._unread = False
+        self._released = False
+        self._open()
+
+    def _open(self):
+        self.last_seq = -1
+        self.reader = self._attach_live()
+        if self.reader is not None:
+            return
+
+        cap = cv2.VideoCapture(self.index)
+        ret, frame = cap.read() if cap.isOpened() else (False, None)
+        if not ret:
+            # The device may be held by a producer that started at the same time
+            cap.release()
+            self.reader = self._attach_live()
+            return
+        try:
+            self.writer = FrameBusWriter(self.name, frame.shape, slots=self.slots)
+        except FileExistsError:
+            # Another process claimed the bus first; use its frames instead
+            cap.release()
+            self.reader = self._attach_live()
+            return
+        self.cap = cap
+        self.timestamp = time.time()
+        self.last_seq = self.writer.publish(frame, ts=self.timestamp)
+        self._unread = True
+
+    def _attach_live(self):
+        try:
+            reader = FrameBusReader(self.name)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not reader.producer_alive():
+            # Left behind by a producer that exited; take over the camera
+            reader.close()
+            try:
+                stale = shared_memory.SharedMemory(name=self.name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            return None
+        return reader
+
+    @property
+    def is_producer(self):
+        return self.writer is not None
+
+    def isOpened(self):
+        return not self._released and (self.reader is not None or self.writer is not None)
+
+    def read(self, copy=False):
+        if self._released:
+            return False, None
+        if self.reader is None and self.writer is None:
+            self._open()
+            if not self.isOpened():
+                return False, None
+
+        if self.reader is not None:
+            while True:
+                got = self.reader.read(after=self.last_seq, timeout=self.timeout)
+                if got is not None:
+                    seq, ts, frame = got
+                    if copy:
+                        frame = frame.copy()
+                        if not self.reader.valid(seq):
+                            continue  # overwritten while copying; take the next frame
+                    self.last_seq, self.timestamp = seq, ts
+                    return True, frame
+                if self.reader.producer_alive():
+                    if self.block:
+                        continue
+                    return False, None
+                break
+            # Producer released the camera or exited: take the device over
+            self.reader.close()
+            self.reader = None
+            self._open()
+            if not self.isOpened():
+                return False, None
+            return self.read(copy)
+
+        if self._unread:
+            # Frame grabbed while claiming the bus in _open
+            self._unread = False
+            return True, self.writer.frame(self.last_seq)
+
+        # Decode straight into the next ring slot; our own slots are only
+        # reused by our next read, so no copy is needed here
+        view = self.writer.begin()
+        ret, frame = self.cap.read(view)
+        if not ret:
+            self.writer.abort()
+            return False, None
+        self.timestamp = time.time()
+        if frame is not view:
+            if frame.shape != view.shape:
+                self.writer.abort()
+                return True, frame
+            view[...] = frame
+        self.last_seq = self.writer.commit(ts=self.timestamp)
+        return True, self.writer.frame(self.last_seq)
+
+    def annotate(self, meta):
+        """Attach detection metadata to the last frame (producer only)."""
+        if self.writer is not None and self.last_seq >= 0:
+            self.writer.annotate(self.last_seq, meta)
+
+    def meta(self):
+        """Most recent detection metadata published on the bus, or None.
+
+        The producer annotates a frame after processing it, so this looks back
+        from the newest frame to the latest one that carries metadata.
+        """
+        bus = self.reader or self.writer
+        if bus is None:
+            return None
+        latest = bus.latest_seq
+        for seq in range(latest, max(-1, latest - bus.slots), -1):
+            meta = bus.meta(seq)
+            if meta is not None:
+                return meta
+        return None
+
+    def release(self):
+        self._released = True
+        # Free the device before closing the bus so a consumer can take it over
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
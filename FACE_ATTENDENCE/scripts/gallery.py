@@ -0,0 +1,113 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+# Encodings per pickled record; an identity with more encodings spans several records
+CHUNK_SIZE = 64
+
+
+def iter_gallery(path):
+    """Yield gallery records ({student_id, name, encodings}) one at a time.
+
+    The gallery is a stream of pickled records. Galleries written as a single
+    pickled list by older versions are read as well.
+    """
+    with open(path, "rb") as f:
+        while True:
+            try:
+                obj = pickle.load(f)
+            except EOFError:
+                return
+            if isinstance(obj, list):
+                yield from obj
+            else:
+                yield obj
+
+
+def folder_fingerprint(folder):
+    """Short hash of the file names, sizes and mtimes in an identity folder."""
+    h = hashlib.sha1()
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if entry.is_file():
+            st = entry.stat()
+            h.update(f"{entry.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class GalleryWriter:
+    """Streams encodings to disk in chunks and checkpoints finished identities.
+
+    Records go to ``<path>.partial``; each finished identity is appended to
+    ``<path>.progress`` with the file offset after it and its folder
+    fingerprint. An interrupted run resumes from the last checkpoint that still
+    matches ``current`` (identity key -> fingerprint of the image tree now):
+    from the first identity that was deleted or whose photos changed onwards,
+    everything is dropped and encoded again. ``finish`` moves the complete
+    gallery into place.
+    """
+
+    def __init__(self, path, current, chunk_size=CHUNK_SIZE, resume=True):
+        self.path = Path(path)
+        self.partial = self.path.with_name(self.path.name + ".partial")
+        self.progress = self.path.with_name(self.path.name + ".progress")
+        self.chunk_size = chunk_size
+        self.done = set()
+        self._buffer = []
+        self._label = None
+
+        offset = 0
+        kept = []
+        if resume and self.partial.exists() and self.progress.exists():
+            with open(self.progress) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        break
+                    pos, key, fingerprint = parts
+                    if current.get(key) != fingerprint:
+                        break
+                    offset = int(pos)
+                    self.done.add(key)
+                    kept.append(line)
+        else:
+            self.partial.write_bytes(b"")
+        # Keep only the checkpoints that are still valid
+        self.progress.write_text("".join(kept))
+
+        self._f = open(self.partial, "r+b")
+        # Drop anything written after the last checkpoint (half-finished identity)
+        self._f.truncate(offset)
+        self._f.seek(offset)
+
+    def add(self, student_id, name, encodings):
+        if self._label != (student_id, name):
+            self._flush()
+            self._label = (student_id, name)
+        self._buffer.extend(e.tolist() for e in encodings)  # pickle/json friendly
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            sid, name = self._label
+            for i in range(0, len(self._buffer), self.chunk_size):
+                chunk = self._buffer[i:i + self.chunk_size]
+                pickle.dump({'student_id': sid, 'name': name, 'encodings': chunk}, self._f)
+            self._buffer = []
+
+    def commit(self, key, fingerprint):
+        """Checkpoint: everything added so far is durable and ``key`` is done."""
+        self._flush()
+        self._label = None
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        with open(self.progress, "a") as f:
+            f.write(f"{self._f.tell()}\t{key}\t{fingerprint}\n")
+        self.done.add(key)
+
+    def finish(self):
+        self._flush()
+        self._f.close()
+        os.replace(self.partial, self.path)
+        self.progress.unlink()
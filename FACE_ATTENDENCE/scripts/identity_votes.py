@@ -0,0 +1,177 @@
+import time
+import cv2
+import face_recognition
+import numpy as np
+from detectors import box_iou
+
+# ------------------ Voting parameters ------------------ #
+MATCH_THRESHOLD = 0.5     # same cut-off the single-frame check used
+MAX_CALLS_PER_SEC = 2.0   # hard cap on face_encodings calls per track
+MIN_SAMPLES = 3           # encodings needed before an identity may be committed
+MAX_SAMPLES = 6           # report unknown after this many encodings, then start a new round
+TOP_K = 3                 # distances averaged per identity
+VOTE_RATIO = 0.6          # share of samples that must agree on the identity
+CROP_MARGIN = 0.25
+
+
+def face_quality(gray_crop):
+    # Sharpness: variance of the Laplacian, higher is sharper
+    return float(cv2.Laplacian(gray_crop, cv2.CV_64F).var())
+
+
+class FaceTracker:
+    """Keeps face ids stable across frames by IoU matching of detections."""
+
+    def __init__(self, min_iou=0.3, max_missing=10):
+        self.min_iou = min_iou
+        self.max_missing = max_missing
+        self.tracks = {}  # id -> {'rect': dlib.rectangle, 'missing': int}
+        self._next_id = 0
+
+    def update(self, rects):
+        """Return one track id per rect, in the same order."""
+        ids = []
+        free = set(self.tracks)
+        for rect in rects:
+            best_id, best_iou = None, self.min_iou
+            for tid in free:
+                iou = box_iou(rect, self.tracks[tid]['rect'])
+                if iou >= best_iou:
+                    best_id, best_iou = tid, iou
+            if best_id is None:
+                best_id = self._next_id
+                self._next_id += 1
+            else:
+                free.discard(best_id)
+            self.tracks[best_id] = {'rect': rect, 'missing': 0}
+            ids.append(best_id)
+
+        for tid in free:
+            self.tracks[tid]['missing'] += 1
+            if self.tracks[tid]['missing'] > self.max_missing:
+                del self.tracks[tid]
+        return ids
+
+
+class IdentityVoter:
+    """Accumulates identity evidence per track over several frames.
+
+    Each track is encoded at most ``max_calls_per_sec`` times per second, and
+    every call uses the sharpest face seen since the previous call. Per
+    identity, the mean of the ``top_k`` smallest distances decides; an
+    identity is committed once enough samples agree on it. A round of
+    ``max_samples`` encodings without agreement is reported as unknown and the
+    evidence is reset, so voting keeps going while the face stays in view.
+    """
+
+    def __init__(self, known_encodings, known_names, threshold=MATCH_THRESHOLD,
+                 max_calls_per_sec=MAX_CALLS_PER_SEC, min_samples=MIN_SAMPLES,
+                 max_samples=MAX_SAMPLES, top_k=TOP_K, vote_ratio=VOTE_RATIO):
+        self.identities = sorted(set(known_names))
+        index = {n: i for i, n in enumerate(self.identities)}
+        self.known_encodings = np.array(known_encodings)
+        self.labels = np.array([index[n] for n in known_names], dtype=int)
+        self.threshold = threshold
+        self.min_interval = 1.0 / max_calls_per_sec
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.top_k = top_k
+        self.vote_ratio = vote_ratio
+        self.tracks = {}
+        self.latencies = []  # seconds from first sighting to committed identity, per track
+
+    def _new_track(self, now):
+        return {
+            'first_seen': now,
+            'window_start': now,
+            'candidate': None,   # (quality, rgb crop, css box in crop)
+            'distances': [],     # per-sample min distance per identity
+            'calls': 0,          # encoder calls in the current round
+            'total_calls': 0,    # encoder calls over the track's lifetime
+            'rounds': 0,         # unknown rounds so far
+            'decision': None,
+        }
+
+    def observe(self, track_id, frame, rect, now=None):
+        """Feed one BGR frame for a track; returns the decision dict once made."""
+        now = time.monotonic() if now is None else now
+        tr = self.tracks.setdefault(track_id, self._new_track(now))
+        if tr['decision'] is not None:
+            return tr['decision']
+
+        h, w = frame.shape[:2]
+        mx = int((rect.right() - rect.left()) * CROP_MARGIN)
+        my = int((rect.bottom() - rect.top()) * CROP_MARGIN)
+        x0, y0 = max(0, rect.left() - mx), max(0, rect.top() - my)
+        x1, y1 = min(w, rect.right() + mx), min(h, rect.bottom() + my)
+        crop = frame[y0:y1, x0:x1]
+        if crop.size == 0:
+            return None
+
+        quality = face_quality(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY))
+        if tr['candidate'] is None or quality > tr['candidate'][0]:
+            box = (rect.top() - y0, rect.right() - x0, rect.bottom() - y0, rect.left() - x0)
+            tr['candidate'] = (quality, cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), box)
+
+        if now - tr['window_start'] < self.min_interval:
+            return None
+
+        _, rgb, box = tr['candidate']
+        tr['candidate'] = None
+        tr['window_start'] = now
+        tr['calls'] += 1
+        tr['total_calls'] += 1
+        enc = face_recognition.face_encodings(rgb, [box])
+        if enc and len(self.known_encodings):
+            distances = face_recognition.face_distance(self.known_encodings, enc[0])
+            per_identity = np.full(len(self.identities), np.inf)
+            np.minimum.at(per_identity, self.labels, distances)
+            tr['distances'].append(per_identity)
+
+        return self._decide(tr, now)
+
+    def _decide(self, tr, now):
+        samples = len(tr['distances'])
+        if samples < self.min_samples and tr['calls'] < self.max_samples:
+            return None
+
+        decision = {'name': None, 'distance': None, 'samples': samples}
+        if samples:
+            stacked = np.vstack(tr['distances'])
+            k = min(self.top_k, samples)
+            scores = np.sort(stacked, axis=0)[:k].mean(axis=0)
+            best = int(np.argmin(scores))
+            votes = np.bincount(np.argmin(stacked, axis=1), minlength=len(self.identities))
+            confident = (samples >= self.min_samples and scores[best] < self.threshold
+                         and votes[best] / samples >= self.vote_ratio)
+            if confident:
+                decision.update(name=self.identities[best], distance=float(scores[best]))
+            elif tr['calls'] < self.max_samples:
+                return None
+
+        decision['latency'] = now - tr['first_seen']
+        if decision['name'] is None:
+            # Unknown is not final: start a fresh round within the same call budget
+            tr['distances'] = []
+            tr['calls'] = 0
+            tr['rounds'] += 1
+            return decision
+
+        tr['decision'] = decision
+        self.latencies.append(decision['latency'])
+        return decision
+
+    def latency(self, track_id):
+        """Seconds until the track's identity was committed, or None while undecided."""
+        tr = self.tracks.get(track_id)
+        return tr['decision']['latency'] if tr and tr['decision'] else None
+
+    def encoder_calls(self, track_id):
+        """Total face_encodings calls made for a track, across all rounds."""
+        tr = self.tracks.get(track_id)
+        return tr['total_calls'] if tr else 0
+
+    def prune(self, active_ids):
+        for tid in list(self.tracks):
+            if tid not in active_ids:
+                del self.tracks[tid]
@@ -0,0 +1,68 @@
+import time
+import cv2
+
+
+class PreviewStream:
+    """Throttled, downscaled preview of the processing loop.
+
+    Processing keeps working on full-resolution frames; the preview is only
+    rendered when it is due (``max_fps``) and someone is watching. Overlays are
+    given as detection metadata in analysis-frame coordinates and drawn onto the
+    small preview, so the analysis frame is never modified.
+
+    Overlay dicts may contain:
+        box:    (left, top, right, bottom)
+        label:  text drawn above the box
+        points: [(x, y), ...] landmark points
+        color:  BGR tuple for the box
+    """
+
+    def __init__(self, max_fps=10, width=480, jpeg_quality=70, watching=None):
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.width = width
+        self.jpeg_quality = jpeg_quality
+        self.watching = watching  # callable -> bool, None means always watched
+        self.paused = False
+        self._last = 0.0
+
+    def due(self, now=None):
+        if self.paused or (self.watching is not None and not self.watching()):
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self._last >= self.min_interval
+
+    def render(self, frame, overlays=(), text=None):
+        """Downscale ``frame`` once and draw overlays on the small copy (BGR)."""
+        h, w = frame.shape[:2]
+        factor = min(1.0, self.width / w)
+        if factor < 1.0:
+            small = cv2.resize(frame, (self.width, int(h * factor)), interpolation=cv2.INTER_AREA)
+        else:
+            small = frame.copy()
+
+        for ov in overlays:
+            if "box" in ov:
+                left, top, right, bottom = (int(v * factor) for v in ov["box"])
+                cv2.rectangle(small, (left, top), (right, bottom), ov.get("color", (0, 255, 255)), 2)
+                if ov.get("label"):
+                    cv2.putText(small, ov["label"], (left, max(12, top - 6)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            for (x, y) in ov.get("points", ()):
+                cv2.circle(small, (int(x * factor), int(y * factor)), 1, (0, 255, 0), -1)
+
+        if text:
+            cv2.putText(small, text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        return small
+
+    def encode(self, small):
+        ok, buf = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buf.tobytes() if ok else None
+
+    def publish(self, frame, overlays=(), text=None, encode=True):
+        """Return the preview (JPEG bytes, or BGR array if ``encode`` is False)
+        when one is due, otherwise None."""
+        if not self.due():
+            return None
+        self._last = time.monotonic()
+        small = self.render(frame, overlays, text)
+        return self.encode(small) if encode else small
@@ -1,13 +1,29 @@
 import os
-import pickle
+import argparse
 import cv2
 import dlib
-import face_recognition
 import numpy as np
 from scipy.spatial import distance as dist
 from datetime import datetime
-import time
 import csv
+from capture import RecordingCapture, ReplayCapture
+from detectors import build_detector
+from frame_bus import SharedCapture
+from gallery import iter_gallery
+from identity_votes import FaceTracker, IdentityVoter
+from preview import PreviewStream
+from run_report import RunReport
+
+# ------------------ Command line ------------------ #
+# No arguments: live webcam, as launched from main_interface.py
+parser = argparse.ArgumentParser(description="Blink liveness + face recognition")
+source = parser.add_mutually_exclusive_group()
+source.add_argument("--record", help="record the live session to this file")
+source.add_argument("--replay", help="run on a recorded session instead of the webcam")
+parser.add_argument("--fast", action="store_true", help="replay as fast as possible instead of real time")
+parser.add_argument("--report", help="write the per-run performance report (JSON) here")
+parser.add_argument("--headless", action="store_true", help="no preview window")
+args = parser.parse_args()
 
 # ------------------ Base directories ------------------ #
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,18 +39,15 @@ if not os.path.exists(ENC_PATH):
     print("[ERROR] Encodings file not found! Run train_encodings.py first.")
     exit()
 
-with open(ENC_PATH, "rb") as f:
-    data = pickle.load(f)
-
 known_encodings = []
 known_names = []
-for student in data:
+for student in iter_gallery(ENC_PATH):
     for enc in student['encodings']:
         known_encodings.append(np.array(enc))
         known_names.append(f"{student['student_id']} - {student['name']}")
 
-# ------------------ Dlib detector & predictor ------------------ #
-detector = dlib.get_frontal_face_detector()
+# ------------------ Face detector & dlib predictor ------------------ #
+detector = build_detector("webcam")
 if not os.path.exists(PREDICTOR_PATH):
     print("[ERROR] Shape predictor model not found! Place 'shape_predictor_68_face_landmarks.dat' in models folder.")
     exit()
@@ -59,7 +72,15 @@ if not os.path.exists(csv_path):
         writer.writerow(["ID-Name", "Date", "Time"])
 
 # ------------------ Video Capture ------------------ #
-cap = cv2.VideoCapture(0)
+if args.replay:
+    cap = ReplayCapture(args.replay, realtime=not args.fast)
+else:
+    # Shares the camera with the launcher / web UI through the frame bus
+    cap = SharedCapture(0)
+    if args.record:
+        cap = RecordingCapture(cap, args.record)
+preview = PreviewStream(max_fps=30, width=960)
+report = RunReport(label=args.replay or "live")
 if not cap.isOpened():
     print("[ERROR] Cannot access webcam!")
     exit()
@@ -76,29 +97,40 @@ def eye_aspect_ratio(eye):
 # ------------------ Blink tracking dictionary ------------------ #
 blink_data = {}
 
+# ------------------ Face tracks & identity voting ------------------ #
+tracker = FaceTracker()
+voter = IdentityVoter(known_encodings, known_names)
+
 start_time = None
 
 # ------------------ Main Loop ------------------ #
 while True:
-    ret, frame = cap.read()
+    with report.stage("capture"):
+        # Private copy: detection, blinks and identity all run on one consistent frame
+        ret, frame = cap.read(copy=True)
     if not ret:
         break
+    # Capture time of this frame; recorded time on replay, so runs are deterministic
+    now = cap.timestamp
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    rects = detector(gray, 0)
+    with report.stage("detect"):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        rects = detector(gray)
 
     if start_time is None:
-        start_time = time.time()
+        start_time = now
 
-    for i, rect in enumerate(rects):
-        # Use face index as a simple ID
-        face_key = i
+    overlays = []
+    track_ids = tracker.update(rects)
+    voter.prune(tracker.tracks)
+    for face_key, rect in zip(track_ids, rects):
 
         if face_key not in blink_data:
             blink_data[face_key] = {'blink_count': 0, 'frame_counter': 0, 'attendance_marked': False}
 
-        shape = predictor(gray, rect)
-        shape = [(shape.part(j).x, shape.part(j).y) for j in range(68)]
+        with report.stage("landmarks"):
+            shape = predictor(gray, rect)
+            shape = [(shape.part(j).x, shape.part(j).y) for j in range(68)]
         leftEye = shape[lStart:lEnd]
         rightEye = shape[rStart:rEnd]
         leftEAR = eye_aspect_ratio(leftEye)
@@ -113,40 +145,47 @@ while True:
                 print(f"[BLINK] Face {face_key} Count: {blink_data[face_key]['blink_count']}")
             blink_data[face_key]['frame_counter'] = 0
 
-        # Draw eye landmarks
-        for (x, y) in leftEye + rightEye:
-            cv2.circle(frame, (x, y), 2, (0, 255, 0), -1)
-
-        # Draw rectangle around face
+        # Overlays are drawn on the preview, never on the analysis frame
         left, top, right, bottom = rect.left(), rect.top(), rect.right(), rect.bottom()
-        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 255), 2)
-
-        # Mark attendance if blink count threshold reached
-        if blink_data[face_key]['blink_count'] >= REQUIRED_BLINKS and not blink_data[face_key]['attendance_marked']:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            enc = face_recognition.face_encodings(rgb, [(top, right, bottom, left)])
-            if enc:
-                distances = face_recognition.face_distance(known_encodings, enc[0])
-                best_idx = np.argmin(distances)
-                if distances[best_idx] < 0.5:  # match threshold
-                    name = known_names[best_idx]
-                    time_str = datetime.now().strftime("%H:%M:%S")
-                    with open(csv_path, "a", newline="") as f:
-                        writer = csv.writer(f)
-                        writer.writerow([name, date_str, time_str])
-                    print(f"[ATTENDANCE] {name} marked at {time_str}")
-                    blink_data[face_key]['attendance_marked'] = True
-
-    elapsed = time.time() - start_time
+        overlays.append({"box": (left, top, right, bottom), "points": leftEye + rightEye})
+
+        # Identity evidence is gathered over several frames while the person blinks
+        with report.stage("identity"):
+            decision = voter.observe(face_key, frame, rect, now=now)
+
+        # Mark attendance once liveness and identity are both settled
+        if (decision and decision['name'] and blink_data[face_key]['blink_count'] >= REQUIRED_BLINKS
+                and not blink_data[face_key]['attendance_marked']):
+            name = decision['name']
+            time_str = datetime.now().strftime("%H:%M:%S")
+            if not args.replay:  # replays must not touch the real attendance log
+                with open(csv_path, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow([name, date_str, time_str])
+            print(f"[ATTENDANCE] {name} marked at {time_str} "
+                  f"({decision['samples']} samples, decided in {decision['latency']:.2f}s)")
+            blink_data[face_key]['attendance_marked'] = True
+        if decision and decision['name']:
+            overlays[-1]['label'] = decision['name']
+
+    # Publish detection metadata alongside the frame for other bus consumers
+    cap.annotate({"faces": [{"box": ov["box"], "label": ov.get("label")} for ov in overlays]})
+
+    elapsed = now - start_time
     total_blinks = sum(face['blink_count'] for face in blink_data.values())
-    cv2.putText(frame, f"Blinks: {total_blinks}", (30, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+    report.frame_done(len(rects))
 
     if elapsed > TIME_LIMIT and total_blinks < REQUIRED_BLINKS * len(rects):
         print("[FAILED] Liveness check failed ❌")
         break
 
-    cv2.imshow("Face + Blink Detection", frame)
+    if args.headless:
+        continue
+
+    shown = preview.publish(frame, overlays, text=f"Blinks: {total_blinks}", encode=False)
+    if shown is not None:
+        cv2.imshow("Face + Blink Detection", shown)
 
     # Stop recognition on any key press
     if cv2.waitKey(1) != -1:
@@ -154,4 +193,11 @@ while True:
         break
 
 cap.release()
-cv2.destroyAllWindows()
+if not args.headless:
+    cv2.destroyAllWindows()
+
+report.decisions = list(voter.latencies)
+report.print()
+if args.report:
+    report.save(args.report)
+    print(f"[INFO] Report saved to {args.report}")
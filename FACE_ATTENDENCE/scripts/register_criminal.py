@@ -4,6 +4,8 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 from PIL import Image, ImageTk
 from pathlib import Path
+from frame_bus import SharedCapture
+from preview import PreviewStream
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 IMG_ROOT = BASE_DIR / 'data' / 'criminal_images'
@@ -60,24 +62,30 @@ class StudentRegisterApp:
         self.video_label.pack(expand=True, fill="both")
 
         # --- Initialize Camera ---
-        self.cap = cv2.VideoCapture(0)
+        self.preview = PreviewStream(max_fps=15, width=600, watching=self.is_visible)
+        self.cap = SharedCapture(0, timeout=0.05, block=False)  # keep the Tk loop responsive
         if not self.cap.isOpened():
             messagebox.showwarning("⚠️ Warning", "Could not access webcam. You can still upload photos.")
             self.cap = None
         else:
             self.update_frame()
 
+    def is_visible(self):
+        # No preview work while the window is minimized or hidden
+        return bool(self.root.winfo_viewable()) and self.root.state() != "iconic"
+
     def update_frame(self):
         if self.cap:
             ret, frame = self.cap.read()
             if ret:
                 frame = cv2.flip(frame, 1)
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(frame)
-                imgtk = ImageTk.PhotoImage(image=img.resize((600, 450)))
-                self.video_label.imgtk = imgtk
-                self.video_label.configure(image=imgtk)
-                self.current_frame = frame
+                self.current_frame = frame  # full-res BGR, saved as-is
+                small = self.preview.publish(frame, encode=False)
+                if small is not None:
+                    img = Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+                    imgtk = ImageTk.PhotoImage(image=img)
+                    self.video_label.imgtk = imgtk
+                    self.video_label.configure(image=imgtk)
             self.root.after(10, self.update_frame)
 
     def save_photo(self):
@@ -101,7 +109,7 @@ class StudentRegisterApp:
 
         img_name = datetime.now().strftime('%Y%m%d_%H%M%S_%f') + ".jpg"
         try:
-            cv2.imwrite(str(student_dir / img_name), cv2.cvtColor(self.current_frame, cv2.COLOR_RGB2BGR))
+            cv2.imwrite(str(student_dir / img_name), self.current_frame)
             self.count += 1
             self.status_label.config(text=f"Status: Saved {self.count}/{self.num_images} images", fg="green")
             print(f"[OK] Saved {self.count}/{self.num_images} -> {img_name}")
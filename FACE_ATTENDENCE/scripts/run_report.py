@@ -0,0 +1,107 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+import numpy as np
+
+# Stages that run once per detected face; only these get a per-face figure
+PER_FACE_STAGES = ('landmarks', 'identity')
+
+
+class RunReport:
+    """Per-run FPS, per-stage latency and detection counts for the recognition loop."""
+
+    def __init__(self, label=""):
+        self.label = label
+        self.stages = {}       # stage -> [ms per frame], 0 on frames where it did not run
+        self.detections = []   # faces found per frame
+        self.decisions = []    # decision latencies (s)
+        self._current = {}
+        self._start = None
+        self._end = None
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        if self._start is None:
+            self._start = t0
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            self._current[name] = self._current.get(name, 0.0) + ms
+
+    def frame_done(self, detections):
+        frames = len(self.detections)
+        for name in set(self.stages) | set(self._current):
+            # A stage first seen now did not run on earlier frames
+            values = self.stages.setdefault(name, [0.0] * frames)
+            values.append(self._current.get(name, 0.0))
+        self._current = {}
+        self.detections.append(detections)
+        self._end = time.perf_counter()
+
+    def summary(self):
+        frames = len(self.detections)
+        wall = self._end - self._start if self._end is not None else 0.0
+        faces = int(sum(self.detections))
+        stages = {}
+        for name, values in self.stages.items():
+            arr = np.array(values)
+            stages[name] = {
+                # per frame, so builds with different face counts compare fairly
+                'mean_ms': round(float(arr.mean()), 2),
+                'p50_ms': round(float(np.percentile(arr, 50)), 2),
+                'p95_ms': round(float(np.percentile(arr, 95)), 2),
+            }
+            if name in PER_FACE_STAGES:
+                stages[name]['per_face_ms'] = round(float(arr.sum()) / faces, 2) if faces else None
+        return {
+            'label': self.label,
+            'frames': frames,
+            'fps': round(frames / wall, 2) if wall else 0.0,
+            'stages': stages,
+            'detections': faces,
+            'frames_with_faces': int(sum(1 for d in self.detections if d)),
+            'decisions': len(self.decisions),
+            'mean_decision_s': round(float(np.mean(self.decisions)), 3) if self.decisions else None,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print(self):
+        print(format_summary(self.summary()))
+
+
+def format_summary(s):
+    lines = [f"[REPORT] {s['label'] or 'run'}: {s['frames']} frames, {s['fps']} fps, "
+             f"{s['detections']} detections, {s['decisions']} decisions"]
+    for name, st in s['stages'].items():
+        line = f"  {name:<10} mean {st['mean_ms']:>8.2f} ms/frame  p50 {st['p50_ms']:>8.2f}  p95 {st['p95_ms']:>8.2f}"
+        if 'per_face_ms' in st:
+            line += f"  per face {st['per_face_ms']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def compare(path_a, path_b):
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+    print(f"{'metric':<22}{'A':>10}{'B':>10}")
+    for key in ('frames', 'fps', 'detections', 'frames_with_faces', 'decisions', 'mean_decision_s'):
+        print(f"{key:<22}{str(a.get(key)):>10}{str(b.get(key)):>10}")
+    for name in sorted(set(a['stages']) | set(b['stages'])):
+        ma = a['stages'].get(name, {}).get('mean_ms')
+        mb = b['stages'].get(name, {}).get('mean_ms')
+        print(f"{name + ' ms/frame':<22}{str(ma):>10}{str(mb):>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python run_report.py <report_a.json> <report_b.json>")
+    else:
+        compare(sys.argv[1], sys.argv[2])
@@ -1,7 +1,7 @@
 from pathlib import Path
-import pickle
 import face_recognition
-import numpy as np
+from detectors import build_detector
+from gallery import GalleryWriter, folder_fingerprint
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 IMG_ROOT = BASE_DIR / 'data' / 'criminal_images'
@@ -18,42 +18,46 @@ def _parse_label_from_dir(dirname: str):
     return base, base
 
 
-def build_encodings():
+def build_encodings(resume=True):
     ENC_DIR.mkdir(parents=True, exist_ok=True)
-    data = []  # list of dicts: {student_id, name, encodings: [np.ndarray,...]}
+    detector = build_detector("training")
 
-    student_dirs = [d for d in IMG_ROOT.iterdir() if d.is_dir()]
+    student_dirs = sorted(d for d in IMG_ROOT.iterdir() if d.is_dir())
     if not student_dirs:
         print("[WARN] No student folders found. Run register_criminal first.")
         return
 
+    # Encodings are streamed to disk per identity, so memory stays flat and an
+    # interrupted run picks up after the last finished identity.
+    current = {d.name: folder_fingerprint(d) for d in student_dirs}
+    writer = GalleryWriter(ENC_PATH, current, resume=resume)
+    if writer.done:
+        print(f"[INFO] Resuming: {len(writer.done)} identities already encoded")
+
     for sdir in student_dirs:
+        if sdir.name in writer.done:
+            continue
         sid, name = _parse_label_from_dir(str(sdir))
         print(f"[INFO] Processing {sid} - {name}")
 
-        encs = []
+        count = 0
         image_paths = list(sdir.glob("*.jpg")) + list(sdir.glob("*.png"))
         for ip in image_paths:
             image = face_recognition.load_image_file(str(ip))
-            boxes = face_recognition.face_locations(image, model='hog')  # fast; use 'cnn' if GPU
+            boxes = detector.locate(image)
             if not boxes:
                 continue
             enc_list = face_recognition.face_encodings(image, boxes)
-            encs.extend(enc_list)
-
-        if encs:
-            data.append({
-                'student_id': sid,
-                'name': name,
-                'encodings': [e.tolist() for e in encs],  # to make it pickle/json friendly
-            })
-            print(f" -> {len(encs)} encodings")
+            writer.add(sid, name, enc_list)
+            count += len(enc_list)
+
+        writer.commit(sdir.name, current[sdir.name])
+        if count:
+            print(f" -> {count} encodings")
         else:
             print(" -> No faces found in images; skip")
 
-    with open(ENC_PATH, 'wb') as f:
-        pickle.dump(data, f)
-
+    writer.finish()
     print(f"[OK] Saved encodings to {ENC_PATH}")
 
 